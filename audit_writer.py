@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Background writer for JSON-lines audit logs.
+Callers enqueue pre-serialized lines; a daemon thread keeps each log file
+open and writes events in batches, flushing on exit.
+"""
+import atexit
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO, Tuple
+
+
+# Batch up to this many events or this many seconds before writing
+BATCH_SIZE = 64
+BATCH_INTERVAL = 0.05
+# Events beyond this backlog are dropped and counted instead of blocking callers
+MAX_PENDING = 10000
+
+_STOP = object()
+
+_audit_q: "queue.SimpleQueue" = queue.SimpleQueue()
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+dropped = 0
+
+
+def _write_batch(files: Dict[str, Optional[TextIO]], batch: List[Tuple[str, str]]):
+    by_file: Dict[str, List[str]] = {}
+    for log_file, line in batch:
+        by_file.setdefault(log_file, []).append(line)
+
+    for log_file, lines in by_file.items():
+        if log_file not in files:
+            try:
+                files[log_file] = open(log_file, "a", encoding="utf-8")
+            except OSError as e:
+                print(f"Warning: Could not write to audit log: {e}", file=sys.stderr)
+                files[log_file] = None
+        f = files[log_file]
+        if f is None:
+            continue
+        try:
+            f.write("".join(lines))
+            f.flush()
+        except OSError as e:
+            print(f"Warning: Could not write to audit log: {e}", file=sys.stderr)
+
+
+def _run():
+    files: Dict[str, Optional[TextIO]] = {}
+    stopping = False
+    while not stopping:
+        item = _audit_q.get()
+        if item is _STOP:
+            break
+        batch = [item]
+        deadline = time.monotonic() + BATCH_INTERVAL
+        while len(batch) < BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = _audit_q.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        _write_batch(files, batch)
+
+    for f in files.values():
+        if f is not None:
+            f.close()
+
+
+def _start():
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="audit-writer", daemon=True)
+            _thread.start()
+            atexit.register(flush)
+
+
+def write_event(log_file: str, line: str):
+    """Queue one JSON line (including trailing newline) for log_file."""
+    global dropped
+    if _audit_q.qsize() >= MAX_PENDING:
+        dropped += 1
+        return
+    _start()
+    _audit_q.put((log_file, line))
+
+
+def flush():
+    """Write all pending events and stop the writer thread."""
+    global _thread
+    with _lock:
+        thread, _thread = _thread, None
+    if thread is None:
+        return
+    _audit_q.put(_STOP)
+    thread.join()
+    if dropped:
+        print(f"Warning: {dropped} audit event(s) dropped", file=sys.stderr)
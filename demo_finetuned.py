@@ -1,39 +1,80 @@
+import copy
+import os
 import torch
 torch.set_float32_matmul_precision('high')
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig, DynamicCache
 from peft import PeftModel
-from transformers import pipeline
 
 model_name = "google/gemma-3-270m-it"
 tokenizer = AutoTokenizer.from_pretrained("google/gemma-3-270m-it")
+# Decode is memory-bandwidth bound, so load low-precision weights: 4-bit NF4 on GPU,
+# dynamic int8 linears on CPU (applied after the adapter is merged below, so not with
+# PII_LORA_RUNTIME=1).
+# Set PII_QUANTIZE=0 to run in the checkpoint's native precision.
+quantize = os.getenv("PII_QUANTIZE", "1") != "0"
+quantization_config = None
+if quantize and torch.cuda.is_available():
+    quantization_config = BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_compute_dtype=torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16,
+        bnb_4bit_quant_type="nf4",
+    )
 base_model = AutoModelForCausalLM.from_pretrained(
     model_name,
     torch_dtype="auto",
-    device_map="auto"
+    device_map="auto",
+    quantization_config=quantization_config,
 )
 # model = base_model
 
 adapter_model_name="./models/gemma-3-270m-it-ft/final"
 model = PeftModel.from_pretrained(base_model, adapter_model_name)
+# Fold the LoRA deltas into the base weights for inference; set PII_LORA_RUNTIME=1
+# to keep the adapters separate (e.g. for debugging the adapter itself)
+lora_runtime = os.getenv("PII_LORA_RUNTIME") == "1"
+if not lora_runtime:
+    model = model.merge_and_unload()
 model.eval()
+# Only on the merged model: on a PeftModel it would also swap the Linear layers inside the
+# LoRA modules, whose forward reads lora_A.weight.dtype
+if quantize and quantization_config is None and not lora_runtime:
+    model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+if not lora_runtime:
+    # Shapes change every decode step with a dynamic KV cache, so compile for dynamic shapes
+    model.forward = torch.compile(model.forward, dynamic=True)
 
 user_prompt = """Output all Personal Identifiable Information (PII) in the following text as a list of JSON objects with 'entity' and 'category' fields:
 '{original_text}'
 """
 
-# Load the model and tokenizer into the pipeline
-pipe = pipeline("text-generation", model=model, tokenizer=tokenizer)
+# The chat scaffold before the text is the same for every call, so run it through
+# the model once and reuse its KV cache as the starting point for generation
+_placeholder = "\x00"
+_prompt_template = tokenizer.apply_chat_template(
+    [{"role": "user", "content": user_prompt.format(original_text=_placeholder)}],
+    tokenize=False,
+    add_generation_prompt=True,
+)
+prefix_text, suffix_text = _prompt_template.split(_placeholder)
+prefix_ids = tokenizer(prefix_text, add_special_tokens=False, return_tensors="pt").input_ids.to(model.device)
+with torch.no_grad():
+    prefix_cache = DynamicCache()
+    model(input_ids=prefix_ids, past_key_values=prefix_cache, use_cache=True)
 
-def extract_pii(text, max_tokens=None):
-    max_tokens = max_tokens or len(tokenizer(text).input_ids)
-    messages = [
-        {
-            "role": "user",
-            "content": user_prompt.format(original_text=text),
-        },
-    ]
-    output = pipe(messages, max_new_tokens=max_tokens, return_full_text=False, temperature=0.1)[0]
-    return output["generated_text"]
+def extract_pii(text, max_tokens=256):
+    # Budget is for the generated JSON list, not the input length, so no need to tokenize the text here
+    dynamic_ids = tokenizer(text + suffix_text, add_special_tokens=False, return_tensors="pt").input_ids.to(model.device)
+    input_ids = torch.cat([prefix_ids, dynamic_ids], dim=1)
+    with torch.no_grad():
+        out = model.generate(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            past_key_values=copy.deepcopy(prefix_cache),  # generate() extends the cache in place
+            max_new_tokens=max_tokens,
+            do_sample=False,
+            use_cache=True,
+        )
+    return tokenizer.decode(out[0, input_ids.shape[1]:], skip_special_tokens=True)
 
 if __name__ == '__main__':
     original_text = "My name is Mahmoud Moshirpour and my email is john.doe@example.com. I live in 3244 Main St., Mission Viejo. His SSN is 542873775."
@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from vllm import LLM, SamplingParams
+from vllm.lora.request import LoRARequest
+
+model_name = "google/gemma-3-270m-it"
+adapter_model_name = "./models/gemma-3-270m-it-ft/final"
+
+# vLLM schedules all prompts of a generate/chat call together (continuous batching
+# with PagedAttention), so callers should hand it as many texts at once as possible
+llm = LLM(model=model_name, enable_lora=True, max_lora_rank=16)
+lora_request = LoRARequest("pii", 1, adapter_model_name)
+sampling_params = SamplingParams(temperature=0.1, max_tokens=256)
+
+user_prompt = """Output all Personal Identifiable Information (PII) in the following text as a list of JSON objects with 'entity' and 'category' fields:
+'{original_text}'
+"""
+
+
+def extract_pii_batch(texts):
+    conversations = [
+        [{"role": "user", "content": user_prompt.format(original_text=text)}]
+        for text in texts
+    ]
+    outputs = llm.chat(conversations, sampling_params, lora_request=lora_request, use_tqdm=False)
+    return [output.outputs[0].text for output in outputs]
+
+
+def extract_pii(text):
+    return extract_pii_batch([text])[0]
+
+
+# Single-text async API for services: requests arriving within the same short
+# window are queued and sent to vLLM as one batch
+_BATCH_WINDOW = 0.01
+_pending = None
+# LLM.chat is not safe to call concurrently; a batch that is still generating
+# makes the next one wait its turn here
+_executor = ThreadPoolExecutor(max_workers=1)
+
+
+async def _drain(loop):
+    global _pending
+    await asyncio.sleep(_BATCH_WINDOW)
+    batch, _pending = _pending, None
+    texts = [text for text, _ in batch]
+    try:
+        results = await loop.run_in_executor(_executor, extract_pii_batch, texts)
+    except Exception as exc:
+        for _, future in batch:
+            future.set_exception(exc)
+        return
+    for (_, future), result in zip(batch, results):
+        future.set_result(result)
+
+
+async def extract_pii_async(text):
+    global _pending
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    if _pending is None:
+        _pending = []
+        loop.create_task(_drain(loop))
+    _pending.append((text, future))
+    return await future
+
+
+if __name__ == '__main__':
+    texts = [
+        "My name is Mahmoud Moshirpour and my email is john.doe@example.com. I live in 3244 Main St., Mission Viejo. His SSN is 542873775.",
+        'Tenant: Alex Ramirez | Signer: San Diego Investors Co.',
+    ]
+
+    for extracted_pii in extract_pii_batch(texts):
+        print(extracted_pii)
@@ -4,13 +4,34 @@ Docker-based isolated processing for PII documents.
 Automatically creates and destroys containers for each processing job.
 """
 import argparse
+import functools
 import json
 import os
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
+
+import audit_writer
+
+
+IMAGE_TAG = "pii-processor:latest"
+
+
+@functools.lru_cache(maxsize=1)
+def _client():
+    """Docker client shared by all jobs in this process."""
+    import docker  # type: ignore
+
+    return docker.from_env()
+
+
+@functools.lru_cache(maxsize=1)
+def _image():
+    """Look up the processing image once; raises ImageNotFound if it's missing."""
+    return _client().images.get(IMAGE_TAG)
 
 
 def log_container_event(log_file: str, operation: str, **kwargs):
@@ -22,11 +43,20 @@ def log_container_event(log_file: str, operation: str, **kwargs):
         **kwargs
     }
     
-    try:
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
-    except OSError as e:
-        print(f"Warning: Could not write to audit log: {e}", file=sys.stderr)
+    # Written in batches by a background thread; flushed at exit
+    audit_writer.write_event(log_file, json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def _report_output_clashes(input_files: List[str]) -> bool:
+    """Print inputs that would overwrite each other's output; True if there are any."""
+    # Every job writes /data/output/<stem>.md, so e.g. a/x.md and b/x.pdf would collide
+    by_stem: Dict[str, List[str]] = {}
+    for path in input_files:
+        by_stem.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+    clashes = [paths for paths in by_stem.values() if len(paths) > 1]
+    for paths in clashes:
+        print(f"Error: Inputs would write the same output: {', '.join(paths)}", file=sys.stderr)
+    return bool(clashes)
 
 
 def process_in_container(
@@ -69,7 +99,7 @@ def process_in_container(
     
     # Docker client
     try:
-        client = docker.from_env()
+        client = _client()
     except Exception as e:
         print(f"Error: Could not connect to Docker: {e}", file=sys.stderr)
         print("Make sure Docker is running.", file=sys.stderr)
@@ -101,9 +131,10 @@ def process_in_container(
     )
     
     try:
+        _image()
         # Run container with volume mounts
         container = client.containers.run(
-            "pii-processor:latest",
+            IMAGE_TAG,
             command=cmd,
             volumes={
                 os.path.dirname(input_abs): {'bind': '/data/input', 'mode': 'ro'},
@@ -143,9 +174,9 @@ def process_in_container(
         return 1
     
     except docker.errors.ImageNotFound:
-        print("Error: Docker image 'pii-processor:latest' not found.", file=sys.stderr)
+        print(f"Error: Docker image '{IMAGE_TAG}' not found.", file=sys.stderr)
         print("Build it first with:", file=sys.stderr)
-        print("  docker build -t pii-processor:latest .", file=sys.stderr)
+        print(f"  docker build -t {IMAGE_TAG} .", file=sys.stderr)
         return 1
     
     except Exception as e:
@@ -159,13 +190,154 @@ def process_in_container(
         return 1
 
 
+def process_many(
+    input_files: List[str],
+    output_dir: str,
+    mode: str = "encrypt",
+    entities: Optional[list] = None,
+    audit_log: str = "audit.log",
+    jobs: int = 4
+) -> int:
+    """
+    Process several documents, running up to `jobs` containers concurrently.
+    
+    Each file still gets its own short-lived container; the Docker client and
+    image lookup are shared across them.
+    
+    Returns:
+        Exit code (0 if every file succeeded)
+    """
+    if _report_output_clashes(input_files):
+        return 1
+    
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        codes = list(executor.map(
+            lambda f: process_in_container(f, output_dir, mode, entities, audit_log),
+            input_files
+        ))
+    
+    failed = sum(1 for code in codes if code != 0)
+    print(f"\nProcessed {len(input_files) - failed}/{len(input_files)} file(s) successfully.")
+    return 0 if failed == 0 else 1
+
+
+def process_with_daemon(
+    input_files: List[str],
+    output_dir: str,
+    mode: str = "encrypt",
+    entities: Optional[list] = None,
+    audit_log: str = "audit.log"
+) -> int:
+    """
+    Process documents through one long-lived container.
+    
+    The container runs pii_server.py, which loads the spaCy/Presidio models
+    once; each file is submitted with `docker exec`, so container start-up and
+    model loading are paid once instead of per file. The container is stopped
+    (and auto-removed) when all files are done.
+    
+    Returns:
+        Exit code (0 if every file succeeded)
+    """
+    try:
+        import docker  # type: ignore
+    except ImportError:
+        print("Error: docker-py is not installed. Install it with:", file=sys.stderr)
+        print("  pip install docker", file=sys.stderr)
+        return 1
+    
+    missing = [f for f in input_files if not os.path.isfile(f)]
+    if missing:
+        print(f"Error: File not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+    if _report_output_clashes(input_files):
+        return 1
+    
+    os.makedirs(output_dir, exist_ok=True)
+    output_abs = os.path.abspath(output_dir)
+    
+    # Mount each distinct input directory read-only under /data/input/<n>
+    input_dirs = sorted({os.path.dirname(os.path.abspath(f)) for f in input_files})
+    dir_index = {d: i for i, d in enumerate(input_dirs)}
+    volumes = {d: {'bind': f'/data/input/{i}', 'mode': 'ro'} for d, i in dir_index.items()}
+    volumes[output_abs] = {'bind': '/data/output', 'mode': 'rw'}
+    
+    try:
+        client = _client()
+        _image()
+        container = client.containers.run(
+            IMAGE_TAG,
+            command=["python", "pii_server.py", "serve"],
+            volumes=volumes,
+            remove=True,  # Auto-remove once stopped
+            detach=True,
+            user="piiuser"
+        )
+    except docker.errors.ImageNotFound:
+        print(f"Error: Docker image '{IMAGE_TAG}' not found.", file=sys.stderr)
+        print("Build it first with:", file=sys.stderr)
+        print(f"  docker build -t {IMAGE_TAG} .", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Error: Could not start container: {e}", file=sys.stderr)
+        return 1
+    
+    log_container_event(audit_log, "container_start", mode=mode, daemon=True, files=len(input_files))
+    failed = 0
+    try:
+        for input_file in input_files:
+            input_abs = os.path.abspath(input_file)
+            input_basename = os.path.basename(input_file)
+            container_path = f"/data/input/{dir_index[os.path.dirname(input_abs)]}/{input_basename}"
+            cmd = [
+                "python", "pii_server.py", "submit",
+                "encrypt", container_path,
+                "--outdir", "/data/output",
+                "--mode", mode,
+                "--print-key"
+            ]
+            if entities:
+                cmd.extend(["--entities"] + entities)
+            
+            print(f"Processing {input_file} in long-lived container...")
+            try:
+                exit_code, output = container.exec_run(cmd, user="piiuser")
+            except docker.errors.APIError as e:  # e.g. the server exited and the container is gone
+                failed += 1
+                print(f"Error: Container exec failed: {e}", file=sys.stderr)
+                log_container_event(audit_log, "container_error", input_file=input_basename, error=str(e))
+                continue
+            print(output.decode('utf-8') if isinstance(output, bytes) else str(output))
+            
+            if exit_code == 0:
+                log_container_event(audit_log, "container_job_complete", input_file=input_basename,
+                                    mode=mode, status="success")
+            else:
+                failed += 1
+                log_container_event(audit_log, "container_error", input_file=input_basename,
+                                    error=f"exit code {exit_code}")
+    finally:
+        try:
+            container.stop()
+        except docker.errors.NotFound:
+            pass  # already exited and auto-removed
+        except docker.errors.APIError as e:
+            print(f"Warning: Could not stop container: {e}", file=sys.stderr)
+        log_container_event(audit_log, "container_complete", mode=mode, daemon=True,
+                            files=len(input_files), failed=failed)
+    
+    print(f"\n✓ Processed {len(input_files) - failed}/{len(input_files)} file(s). Container automatically destroyed.")
+    return 0 if failed == 0 else 1
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Process PII documents in isolated Docker containers"
     )
     parser.add_argument(
         "input",
-        help="Input PDF or Markdown file"
+        nargs="+",
+        help="Input PDF or Markdown file(s)"
     )
     parser.add_argument(
         "-o", "--output",
@@ -188,6 +360,17 @@ def main() -> int:
         default="audit.log",
         help="Audit log file path (default: audit.log)"
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="Containers to run concurrently when several inputs are given (default: 4)"
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run all inputs through one long-lived container instead of one container per file"
+    )
     parser.add_argument(
         "--build",
         action="store_true",
@@ -200,11 +383,10 @@ def main() -> int:
     if args.build:
         print("Building Docker image...")
         try:
-            import docker
-            client = docker.from_env()
+            client = _client()
             image, logs = client.images.build(
                 path=".",
-                tag="pii-processor:latest",
+                tag=IMAGE_TAG,
                 rm=True
             )
             for log in logs:
@@ -215,9 +397,26 @@ def main() -> int:
             print(f"Error building image: {e}", file=sys.stderr)
             return 1
     
-    # Process document
+    # Process document(s)
+    if args.daemon:
+        return process_with_daemon(
+            input_files=args.input,
+            output_dir=args.output,
+            mode=args.mode,
+            entities=args.entities,
+            audit_log=args.audit_log
+        )
+    if len(args.input) > 1:
+        return process_many(
+            input_files=args.input,
+            output_dir=args.output,
+            mode=args.mode,
+            entities=args.entities,
+            audit_log=args.audit_log,
+            jobs=args.jobs
+        )
     return process_in_container(
-        input_file=args.input,
+        input_file=args.input[0],
         output_dir=args.output,
         mode=args.mode,
         entities=args.entities,
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Hyperscan-accelerated pattern matching for Presidio.
+Compiles the regexes of Presidio's pattern recognizers into one Hyperscan
+database and scans the text once, instead of running each recognizer's
+Python regex in turn. Recognizers that are not regex based (spaCy NER,
+phone numbers) and patterns Hyperscan cannot compile still go through the
+regular AnalyzerEngine. Context-word score boosting is not applied to the
+Hyperscan matches.
+
+Building the database is slow (mostly probing which patterns Hyperscan
+rejects), so probe results and the compiled database are cached under
+~/.cache/fast_analyzer, keyed by the Hyperscan version and the patterns.
+"""
+import bisect
+import hashlib
+import importlib.metadata
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # Optional; byte offsets are then mapped with a per-char table
+    np = None
+
+
+# Bump when the cached probe results or database layout change
+_CACHE_VERSION = "1"
+
+
+def _cache_dir() -> str:
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "fast_analyzer")
+
+
+def _read_cache(name: str) -> Optional[bytes]:
+    try:
+        with open(os.path.join(_cache_dir(), name), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cache(name: str, data: bytes) -> None:
+    # Best-effort; written atomically so concurrent processes never see a partial file
+    try:
+        os.makedirs(_cache_dir(), mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_cache_dir(), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(_cache_dir(), name))
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
+@dataclass
+class _CompiledPattern:
+    recognizer: object
+    entity_type: str
+    score: float
+
+
+def _char_offsets(data: bytes, text: str):
+    """Return a function mapping UTF-8 byte offsets in data to str offsets in text."""
+    if len(data) == len(text):  # Pure ASCII
+        return lambda offset: offset
+    if np is not None:
+        # The char offset of a byte offset is the number of characters starting
+        # before it, i.e. of non-continuation bytes (not 0b10xxxxxx) before it
+        codes = np.frombuffer(data, dtype=np.uint8)
+        chars_before = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum((codes & 0xC0) != 0x80, out=chars_before[1:])
+        return lambda offset: int(chars_before[offset])
+    starts = []
+    pos = 0
+    for ch in text:
+        starts.append(pos)
+        pos += len(ch.encode("utf-8"))
+    starts.append(pos)
+    return lambda offset: bisect.bisect_right(starts, offset) - 1
+
+
+class FastAnalyzer:
+    """Wrap an AnalyzerEngine so its pattern recognizers run as one Hyperscan scan."""
+
+    def __init__(self, analyzer, language: str = "en"):
+        try:
+            import hyperscan  # type: ignore
+        except ImportError:
+            raise RuntimeError(
+                "hyperscan is not installed. Install it with:\n"
+                "  pip install hyperscan"
+            )
+        from presidio_analyzer import PatternRecognizer  # type: ignore
+
+        self.analyzer = analyzer
+        self.language = language
+
+        flags = (hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_CASELESS
+                 | hyperscan.HS_FLAG_DOTALL | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_UTF8)
+
+        # Only entity types detected by pattern recognizers alone can skip Presidio;
+        # types that also have an NER or other recognizer (DATE_TIME, PHONE_NUMBER, ...)
+        # go through Presidio anyway, so their patterns are not compiled at all
+        pattern_only: Dict[str, bool] = {}
+        candidates: List[Tuple[object, str, object]] = []
+        for recognizer in analyzer.registry.get_recognizers(language=language, all_fields=True):
+            is_pattern = isinstance(recognizer, PatternRecognizer)
+            for entity in recognizer.supported_entities:
+                pattern_only[entity] = pattern_only.get(entity, True) and is_pattern
+            if is_pattern:
+                entity_type = recognizer.supported_entities[0]
+                candidates.extend((recognizer, entity_type, pattern) for pattern in recognizer.patterns)
+
+        try:
+            hs_version = importlib.metadata.version("hyperscan")
+        except importlib.metadata.PackageNotFoundError:
+            hs_version = "unknown"
+        cache_tag = f"v{_CACHE_VERSION}-hs{hs_version}-{flags}"
+
+        # An entity type is fast only if every one of its patterns compiles; probe
+        # results are cached since rejected patterns take seconds to fail
+        probes_name = f"probes-{cache_tag}.json"
+        try:
+            probes: Dict[str, bool] = json.loads(_read_cache(probes_name) or b"{}")
+        except ValueError:
+            probes = {}
+        probed = len(probes)
+        for _, entity_type, pattern in candidates:
+            if not pattern_only[entity_type]:
+                continue
+            digest = hashlib.sha256(pattern.regex.encode("utf-8")).hexdigest()
+            if digest not in probes:
+                probes[digest] = self._compiles(hyperscan, pattern.regex.encode("utf-8"), flags)
+            if not probes[digest]:
+                pattern_only[entity_type] = False
+        if len(probes) != probed:
+            _write_cache(probes_name, json.dumps(probes).encode("utf-8"))
+
+        self.fast_entities = {entity for entity, ok in pattern_only.items() if ok}
+        self._patterns: List[_CompiledPattern] = []
+        expressions: List[bytes] = []
+        for recognizer, entity_type, pattern in candidates:
+            if entity_type in self.fast_entities:
+                expressions.append(pattern.regex.encode("utf-8"))
+                self._patterns.append(_CompiledPattern(recognizer, entity_type, pattern.score))
+
+        self._hyperscan = hyperscan
+        # A Hyperscan scratch space serves one scan at a time and hs_scan runs
+        # without the GIL, so each thread scanning concurrently gets its own
+        self._local = threading.local()
+        self._db = None
+        if expressions:
+            db_key = hashlib.sha256(b"\0".join([cache_tag.encode("utf-8")] + expressions)).hexdigest()
+            db_name = f"db-{db_key}.hsdb"
+            serialized = _read_cache(db_name)
+            if serialized is not None:
+                try:
+                    self._db = hyperscan.loadb(serialized, hyperscan.HS_MODE_BLOCK)
+                except Exception:
+                    self._db = None
+            if self._db is None:
+                self._db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+                self._db.compile(
+                    expressions=expressions,
+                    ids=list(range(len(expressions))),
+                    elements=len(expressions),
+                    flags=[flags] * len(expressions),
+                )
+                _write_cache(db_name, hyperscan.dumpb(self._db))
+
+    @staticmethod
+    def _compiles(hyperscan, expression: bytes, flags: int) -> bool:
+        # Hyperscan rejects backreferences, lookbehinds and some other PCRE constructs
+        try:
+            db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            db.compile(expressions=[expression], ids=[0], elements=1, flags=[flags])
+        except Exception:
+            return False
+        return True
+
+    def _scratch(self):
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = self._hyperscan.Scratch(self._db)
+        return scratch
+
+    def scan(self, text: str, entities: Optional[List[str]] = None):
+        """Run only the Hyperscan pattern pass and return RecognizerResults."""
+        from presidio_analyzer import RecognizerResult  # type: ignore
+
+        if self._db is None:
+            return []
+
+        data = text.encode("utf-8")
+        # Hyperscan reports every match end; keep the longest match per (pattern, start)
+        spans: Dict[Tuple[int, int], int] = {}
+
+        def on_match(pattern_id, start, end, flags, context):
+            key = (pattern_id, start)
+            if spans.get(key, -1) < end:
+                spans[key] = end
+
+        self._db.scan(data, match_event_handler=on_match, scratch=self._scratch())
+
+        to_char = _char_offsets(data, text)
+        wanted = set(entities) if entities else None
+        results = []
+        seen = set()
+        for (pattern_id, start), end in sorted(spans.items(), key=lambda kv: (kv[0][1], -kv[1])):
+            compiled = self._patterns[pattern_id]
+            if wanted is not None and compiled.entity_type not in wanted:
+                continue
+            char_start, char_end = to_char(start), to_char(end)
+            key = (compiled.entity_type, char_start, char_end)
+            if key in seen:
+                continue
+
+            # Same post-checks PatternRecognizer applies (checksums, known-invalid values)
+            matched = text[char_start:char_end]
+            score = compiled.score
+            validated = compiled.recognizer.validate_result(matched)
+            if validated is False or compiled.recognizer.invalidate_result(matched):
+                continue
+            if validated is True:
+                score = 1.0
+
+            seen.add(key)
+            results.append(RecognizerResult(compiled.entity_type, char_start, char_end, score))
+
+        # Drop matches contained in a longer match of the same entity type; with
+        # results ordered by (start, -end) that is any match ending before the
+        # furthest end seen so far for its type
+        results.sort(key=lambda r: (r.start, -r.end))
+        kept = []
+        max_end: Dict[str, int] = {}
+        for r in results:
+            if max_end.get(r.entity_type, -1) >= r.end:
+                continue
+            max_end[r.entity_type] = r.end
+            kept.append(r)
+        return kept
+
+    def analyze(self, text: str, entities: Optional[List[str]] = None):
+        """Drop-in for AnalyzerEngine.analyze(text, language, entities)."""
+        results = self.scan(text, entities)
+        wanted = entities or self.analyzer.get_supported_entities(language=self.language)
+        remaining = [e for e in wanted if e not in self.fast_entities]
+        if remaining:
+            fast_spans = {(r.entity_type, r.start, r.end) for r in results}
+            for r in self.analyzer.analyze(text=text, language=self.language, entities=remaining):
+                if (r.entity_type, r.start, r.end) not in fast_spans:
+                    results.append(r)
+        return results
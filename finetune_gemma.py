@@ -1,5 +1,5 @@
 from collections import defaultdict
-from datasets import load_dataset
+from datasets import load_dataset, load_from_disk
 from transformers import (
     AutoModelForCausalLM,
     AutoTokenizer
@@ -8,6 +8,7 @@ from peft import LoraConfig, get_peft_model, AutoPeftModelForCausalLM, PeftModel
 from trl import SFTTrainer, SFTConfig
 import torch
 import matplotlib.pyplot as plt
+import importlib.util
 import os
 import re
 torch.backends.cuda.matmul.allow_tf32 = True
@@ -19,6 +20,14 @@ if torch.cuda.get_device_capability()[0] >= 8:
 else:
     torch_dtype = torch.float16
 
+# FlashAttention-2 avoids materializing the NxN attention matrix; it needs an Ampere+ GPU
+# (the same check as bfloat16 above) and the flash_attn package, otherwise PyTorch's
+# fused SDPA kernel is the next best thing
+if torch_dtype == torch.bfloat16 and importlib.util.find_spec("flash_attn") is not None:
+    attn_implementation = "flash_attention_2"
+else:
+    attn_implementation = "sdpa"
+
 # Read more: https://medium.com/data-science-in-your-pocket/a-practical-guide-to-fine-tuning-googles-gemma-3-270m-with-lora-ca03decf2ac1
 # Another example: https://github.com/PromptEngineer48/Gemma3-270m-finetune/blob/main/share_finetune.ipynb
 # https://ai.google.dev/gemma/docs/core/huggingface_text_finetune_qlora
@@ -29,7 +38,7 @@ user_prompt = """Output all Personal Identifiable Information (PII) in the follo
 """
 
 
-def format_prompt_instruct(sample):
+def format_prompt_instruct(batch):
     # count_dict = defaultdict(int)
     # target_text = sample['target_text']
     # for match in pii_pattern.finditer(target_text):
@@ -37,15 +46,18 @@ def format_prompt_instruct(sample):
     #     count_dict[pii_type] += 1
     #     target_text = target_text.replace(match.group(0), f"{pii_type}_{count_dict[pii_type]}", 1)
     
-    messages = [
-        {
-            "role": "user",
-            "content": user_prompt.format(original_text=sample['source_text']),
-        },
-        {"role": "assistant", "content": str(sample['entities'])},
-    ]
+    # Batched: columns arrive as lists, so per-row Python call overhead is amortized
     return {
-        "messages": messages
+        "messages": [
+            [
+                {
+                    "role": "user",
+                    "content": user_prompt.format(original_text=source_text),
+                },
+                {"role": "assistant", "content": str(entities)},
+            ]
+            for source_text, entities in zip(batch['source_text'], batch['entities'])
+        ]
     }
 
 
@@ -68,7 +80,7 @@ model = AutoModelForCausalLM.from_pretrained(
     model_name,
     device_map="auto",
     use_cache=False,
-    attn_implementation="eager",
+    attn_implementation=attn_implementation,
     torch_dtype=torch_dtype
 )
 
@@ -81,8 +93,20 @@ tokenizer = AutoTokenizer.from_pretrained("google/gemma-3-270m-it")
 
 
 dataset_name = "automated-analytics/gretel-pii-fine-grained" # https://huggingface.co/datasets/automated-analytics/gretel-pii-fine-grained/viewer/default/train?views%5B%5D=train&row=5
-dataset = load_dataset(dataset_name, split="train")
-dataset = dataset.map(format_prompt_instruct, remove_columns=dataset.features,batched=False)
+tokenized_path = f"./data/{dataset_name.split('/')[-1]}-tokenized"
+if os.path.isdir(tokenized_path):
+    # Reruns skip formatting and tokenization entirely
+    dataset = load_from_disk(tokenized_path)
+else:
+    dataset = load_dataset(dataset_name, split="train")
+    dataset = dataset.map(format_prompt_instruct, remove_columns=dataset.column_names, batched=True, batch_size=1000, num_proc=os.cpu_count())
+    # Tokenize once up front; SFTTrainer uses an existing input_ids column as-is
+    dataset = dataset.map(
+        lambda batch: tokenizer.apply_chat_template(batch['messages'], tokenize=True, return_dict=True),
+        batched=True,
+        remove_columns=['messages'],
+    )
+    dataset.save_to_disk(tokenized_path)
 # dataset = dataset.train_test_split(test_size=0.2, seed=42)
 # print(model)
 
@@ -118,6 +142,10 @@ training_args = SFTConfig(
     max_grad_norm=0.3,                      # max gradient norm based on QLoRA paper
     warmup_ratio=0.03,                      # warmup ratio based on QLoRA paper
     lr_scheduler_type="constant",           # use constant learning rate scheduler
+    # Packed batches are padding-free: only flash_attention_2 keeps packed examples from
+    # attending to each other, so SDPA falls back to padded batches
+    packing=attn_implementation == "flash_attention_2",
+    max_length=1024,                        # (packed) sequence length
     dataset_kwargs={
         "add_special_tokens": False, # We template with special tokens
         # "append_concat_token": True, # Add EOS token as separator token between examples
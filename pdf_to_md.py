@@ -1,81 +1,184 @@
 import argparse
+import hashlib
+import importlib.metadata
+import itertools
 import os
 import re
+import shutil
 import sys
-from typing import Optional
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 
-def _normalize_text(text: str) -> str:
+_CRLF = re.compile(r"\r\n?")
+_TRAILING_SPACE = re.compile(r"[^\S\n]+(?=\n)")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def _normalize_chunk(text: str) -> str:
     # Normalize line breaks
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _CRLF.sub("\n", text)
     # Trim trailing spaces on each line
-    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    text = _TRAILING_SPACE.sub("", text)
     # Collapse 3+ blank lines to a single blank line
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip() + "\n"
+    return _BLANK_LINES.sub("\n\n", text)
 
 
-def extract_text_with_pypdf(pdf_path: str) -> Optional[str]:
-    try:
-        from pypdf import PdfReader  # type: ignore
-    except Exception:
-        return None
+def _normalize_text(text: str) -> str:
+    return _normalize_chunk(text).strip() + "\n"
+
+
+def _write_normalized(pages: Iterable[str], out: TextIO) -> None:
+    # Same result as _normalize_text("\n\n".join(pages)), written page by page.
+    # Each page is emitted up to its last non-whitespace character; the trailing
+    # whitespace is carried into the next page so CRLFs, trailing spaces and
+    # blank-line runs spanning a page boundary are normalized as a whole.
+    carry = ""
+    started = False
+    for i, page in enumerate(pages):
+        buf = carry + ("\n\n" if i else "") + page
+        end = len(buf.rstrip())
+        chunk, carry = _normalize_chunk(buf[:end]), buf[end:]
+        if not started:
+            chunk = chunk.lstrip()
+            started = bool(chunk)
+        out.write(chunk)
+    out.write("\n")
+
+
+# Probe PDF backends once at import; extraction only goes through installed ones
+try:
+    import fitz  # PyMuPDF  # type: ignore
+except Exception:
+    fitz = None
+
+try:
+    from pdfminer.high_level import extract_pages  # type: ignore
+    from pdfminer.layout import LTTextContainer  # type: ignore
+except Exception:
+    extract_pages = None
+
+try:
+    from pypdf import PdfReader  # type: ignore
+except Exception:
+    PdfReader = None
+
+
+def iter_pages_with_pypdf(pdf_path: str) -> Iterator[str]:
+    reader = PdfReader(pdf_path)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def iter_pages_with_pdfminer(pdf_path: str) -> Iterator[str]:
+    for page_layout in extract_pages(pdf_path):
+        yield "".join(el.get_text() for el in page_layout if isinstance(el, LTTextContainer))
+
+
+# Below this many pages, process start-up costs more than it saves
+_PARALLEL_MIN_PAGES = 16
+_MAX_WORKERS = 8
+
+
+def _pymupdf_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    # Each worker opens its own document; PyMuPDF objects can't be shared across threads
+    with fitz.open(pdf_path) as doc:
+        return [doc.load_page(i).get_text() for i in range(start, stop)]
+
+
+def iter_pages_with_pymupdf(pdf_path: str) -> Iterator[str]:
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+        workers = min(_MAX_WORKERS, os.cpu_count() or 1)
+        if page_count < _PARALLEL_MIN_PAGES or workers < 2:
+            for page in doc:
+                yield page.get_text()
+            return
+
+    # Split pages into contiguous ranges and extract them in parallel processes
+    step = -(-page_count // workers)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=len(ranges)) as ex:
+        for chunk in ex.map(_pymupdf_page_range, [pdf_path] * len(ranges), *zip(*ranges)):
+            yield from chunk
+
+
+# Installed backends in preference order: PyMuPDF (best layout), pdfminer.six, pypdf
+_BACKENDS: List[Tuple[str, Callable[[str], Iterator[str]]]] = [
+    (dist, iter_pages)
+    for dist, module, iter_pages in (
+        ("pymupdf", fitz, iter_pages_with_pymupdf),
+        ("pdfminer.six", extract_pages, iter_pages_with_pdfminer),
+        ("pypdf", PdfReader, iter_pages_with_pypdf),
+    )
+    if module is not None
+]
 
-    try:
-        reader = PdfReader(pdf_path)
-        pages_text = []
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            pages_text.append(page_text)
-        return "\n\n".join(pages_text)
-    except Exception:
-        return None
 
+def _no_backend_error() -> RuntimeError:
+    return RuntimeError(
+        "No available PDF parsing backend found. Please install one of:\n"
+        "  - PyMuPDF: pip install pymupdf\n"
+        "  - pdfminer.six: pip install pdfminer.six\n"
+        "  - pypdf: pip install pypdf\n"
+    )
 
-def extract_text_with_pdfminer(pdf_path: str) -> Optional[str]:
-    try:
-        from pdfminer.high_level import extract_text  # type: ignore
-    except Exception:
-        return None
 
-    try:
-        return extract_text(pdf_path) or ""
-    except Exception:
-        return None
+def extract_pdf_text(pdf_path: str) -> str:
+    # A backend that fails on any page falls through to the next one
+    for _, iter_pages in _BACKENDS:
+        try:
+            text = "\n\n".join(iter_pages(pdf_path))
+        except Exception:
+            continue
+        if text:
+            return text
 
+    raise _no_backend_error()
 
-def extract_text_with_pymupdf(pdf_path: str) -> Optional[str]:
-    try:
-        import fitz  # PyMuPDF  # type: ignore
-    except Exception:
-        return None
 
+# Bump when the normalization output changes so stale cache entries are ignored
+_CACHE_VERSION = "1"
+
+
+def _cache_dir() -> str:
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdf_to_md")
+
+
+def _backend_tag() -> str:
+    # The first installed backend is the one that will be used for extraction
+    if not _BACKENDS:
+        return "none"
+    dist = _BACKENDS[0][0]
     try:
-        doc = fitz.open(pdf_path)
-        pages_text = []
-        for page in doc:
-            pages_text.append(page.get_text())
-        return "\n\n".join(pages_text)
-    except Exception:
-        return None
+        return f"{dist}-{importlib.metadata.version(dist)}"
+    except importlib.metadata.PackageNotFoundError:
+        return dist
 
 
-def extract_pdf_text(pdf_path: str) -> str:
-    # Try PyMuPDF (best layout), then pdfminer.six, then pypdf
-    for extractor in (extract_text_with_pymupdf, extract_text_with_pdfminer, extract_text_with_pypdf):
-        text = extractor(pdf_path)
-        if text:
-            return text
+def _cache_path(pdf_path: str) -> str:
+    with open(pdf_path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    return os.path.join(_cache_dir(), f"{digest}-{_backend_tag()}-v{_CACHE_VERSION}.md")
 
-    raise RuntimeError(
-        "No available PDF parsing backend found. Please install one of:\n"
-        "  - PyMuPDF: pip install pymupdf\n"
-        "  - pdfminer.six: pip install pdfminer.six\n"
-        "  - pypdf: pip install pypdf\n"
-    )
+
+def _store_in_cache(md_path: str, cache_path: str) -> None:
+    # Cached Markdown still contains the raw PII, so keep it private to the user
+    os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as dst, open(md_path, "rb") as src:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
 
 
-def convert_pdf_to_md(pdf_path: str, output_md_path: Optional[str] = None, output_dir: Optional[str] = None) -> str:
+def convert_pdf_to_md(pdf_path: str, output_md_path: Optional[str] = None, output_dir: Optional[str] = None,
+                      use_cache: bool = False) -> str:
     if not os.path.isfile(pdf_path):
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
@@ -86,12 +189,39 @@ def convert_pdf_to_md(pdf_path: str, output_md_path: Optional[str] = None, outpu
         os.makedirs(out_dir, exist_ok=True)
         output_md_path = os.path.join(out_dir, base + ".md")
 
-    text = extract_pdf_text(pdf_path)
-    text = _normalize_text(text)
-
-    # Write Markdown (plain text, no extra markup conversion)
-    with open(output_md_path, "w", encoding="utf-8", newline="\n") as f:
-        f.write(text)
+    # Identical PDF content converted before by the same backend: reuse the result.
+    # Opt-in only, since cached conversions keep the unmasked text on disk
+    cache_path = _cache_path(pdf_path) if use_cache else None
+    if cache_path and os.path.isfile(cache_path):
+        shutil.copyfile(cache_path, output_md_path)
+        return output_md_path
+
+    # Write Markdown (plain text, no extra markup conversion) as pages are extracted.
+    # Pages go to a temp file that only replaces output_md_path once a backend got
+    # through the whole PDF; on failure it is removed and the next backend is tried
+    tmp_path = f"{output_md_path}.{os.getpid()}.tmp"
+    for _, iter_pages in _BACKENDS:
+        try:
+            with open(tmp_path, "w", encoding="utf-8", newline="\n", buffering=1 << 20) as f:
+                pages = iter_pages(pdf_path)
+                first = next(pages)  # No pages: treat like a failed backend
+                _write_normalized(itertools.chain([first], pages), f)
+        except Exception:
+            os.unlink(tmp_path)
+            continue
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        os.replace(tmp_path, output_md_path)
+        break
+    else:
+        raise _no_backend_error()
+
+    if cache_path:
+        try:
+            _store_in_cache(output_md_path, cache_path)
+        except OSError:
+            pass  # Caching is best-effort
 
     return output_md_path
 
@@ -101,6 +231,8 @@ def main() -> int:
     parser.add_argument("pdf", help="Input PDF file path, e.g. leasing_agreement.pdf")
     parser.add_argument("-o", "--output", help="Output .md path; if omitted, writes to <same-name-folder>/<same-name>.md")
     parser.add_argument("--outdir", help="Output directory; mutually exclusive with --output. Defaults to a folder named after the PDF.")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse/store conversions in ~/.cache/pdf_to_md (stores the extracted, unmasked text)")
 
     args = parser.parse_args()
 
@@ -108,7 +240,7 @@ def main() -> int:
         if args.output and args.outdir:
             print("--output and --outdir cannot be used together", file=sys.stderr)
             return 1
-        out_path = convert_pdf_to_md(args.pdf, args.output, args.outdir)
+        out_path = convert_pdf_to_md(args.pdf, args.output, args.outdir, use_cache=args.cache)
         print(f"Generated: {out_path}")
         return 0
     except Exception as e:
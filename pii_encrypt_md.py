@@ -1,24 +1,82 @@
 import argparse
 import base64
+import bisect
+import functools
+import hashlib
 import json
 import logging
+import mmap
 import os
 import re
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+import audit_writer
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # Optional; falls back to the stdlib json module
+    orjson = None
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # Optional; line starts are then found with str.find
+    np = None
+
+
+# Buffer size for Markdown/report I/O; stdlib json.dump in particular issues many small writes
+_IO_BUFFER_SIZE = 1 << 20
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize obj as one compact JSON line (non-ASCII kept as-is)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _dump(data: Any, path: str):
+    """Write data to path as indented JSON."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, "w", encoding="utf-8", newline="\n", buffering=_IO_BUFFER_SIZE) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
 
 
 # ---- Audit logging setup ----
+class _AuditWriterHandler(logging.Handler):
+    """Hand formatted records to audit_writer, which appends them to log_file in batches."""
+
+    def __init__(self, log_file: str):
+        super().__init__()
+        self.log_file = log_file
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            audit_writer.write_event(self.log_file, self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
 def setup_audit_logger(log_file: str = "audit.log") -> logging.Logger:
-    """Setup structured audit logger that outputs JSON format."""
+    """Setup structured audit logger that outputs JSON format.
+
+    Records are written by audit_writer's background thread in batches, the
+    same path cleanup.py and docker_process.py use; pending records are
+    flushed at exit.
+    """
     audit_logger = logging.getLogger("audit")
     audit_logger.setLevel(logging.INFO)
     
     # Avoid duplicate handlers
     if not audit_logger.handlers:
-        handler = logging.FileHandler(log_file, encoding="utf-8")
+        handler = _AuditWriterHandler(log_file)
         handler.setFormatter(logging.Formatter("%(message)s"))
         audit_logger.addHandler(handler)
     
@@ -35,17 +93,16 @@ def log_audit_event(operation: str, file_path: str, **kwargs):
         "user": os.getenv("USER") or os.getenv("USERNAME") or "unknown",
         **kwargs
     }
-    audit_logger.info(json.dumps(event, ensure_ascii=False))
+    audit_logger.info(_dumps(event))
 
 
 # ---- Crypto helpers (Fernet) ----
 def ensure_fernet_key(key_b64: Optional[str]) -> bytes:
     if key_b64:
         try:
-            key = base64.urlsafe_b64decode(key_b64)
-            # Re-encode to Fernet format if needed
-            key_b64_checked = base64.urlsafe_b64encode(key)
-            return key_b64_checked
+            # Validate only; Fernet decodes the key itself, so no need to re-encode it
+            base64.urlsafe_b64decode(key_b64)
+            return key_b64.encode("ascii")
         except Exception as exc:
             raise ValueError(f"Invalid key: {exc}")
     else:
@@ -54,53 +111,150 @@ def ensure_fernet_key(key_b64: Optional[str]) -> bytes:
         return Fernet.generate_key()
 
 
-def encrypt_text(plaintext: str, key_b64: bytes) -> str:
+@functools.lru_cache(maxsize=8)
+def _get_fernet(key_b64: bytes):
+    # Fernet() decodes and validates the key; do that once per key, not per token
     from cryptography.fernet import Fernet  # type: ignore
 
-    f = Fernet(key_b64)
+    return Fernet(key_b64)
+
+
+def encrypt_text(plaintext: str, key_b64: bytes) -> str:
+    f = _get_fernet(key_b64)
     token = f.encrypt(plaintext.encode("utf-8"))
-    return token.decode("utf-8")
+    # Fernet tokens are urlsafe base64, so the cheaper ASCII codec suffices
+    return token.decode("ascii")
 
 
 def decrypt_text(token: str, key_b64: bytes) -> str:
-    from cryptography.fernet import Fernet  # type: ignore
+    f = _get_fernet(key_b64)
+    try:
+        token_bytes = token.encode("ascii")
+    except UnicodeEncodeError:
+        from cryptography.fernet import InvalidToken  # type: ignore
 
-    f = Fernet(key_b64)
-    return f.decrypt(token.encode("utf-8")).decode("utf-8")
+        raise InvalidToken
+    return f.decrypt(token_bytes).decode("utf-8")
 
 
 # ---- Presidio analyzer setup ----
-def build_analyzer():
+# Loading spaCy and warming up the engine takes seconds, so each built analyzer
+# is kept per model name and reused for the rest of the process
+_ANALYZER_CACHE: Dict[str, Any] = {}
+_ANALYZER_LOCK = threading.Lock()
+_DEFAULT_MODELS = ("en_core_web_lg", "en_core_web_sm")
+
+
+def _restrict_phone_regions(analyzer) -> None:
+    # The phone recognizer tries every format of every supported region; limiting
+    # the regions (e.g. PII_PHONE_REGIONS=US,CA) cuts its cost accordingly
+    regions = os.getenv("PII_PHONE_REGIONS")
+    if not regions:
+        return
+    from presidio_analyzer.predefined_recognizers import PhoneRecognizer  # type: ignore
+
+    analyzer.registry.remove_recognizer("PhoneRecognizer")
+    analyzer.registry.add_recognizer(PhoneRecognizer(
+        supported_regions=tuple(r.strip().upper() for r in regions.split(",") if r.strip())
+    ))
+
+
+def _trim_pipeline(analyzer) -> None:
+    # PII_FAST=1 keeps only the spaCy components NER needs. Lemmas (used for
+    # context-word score boosting) and sentence boundaries are no longer produced
+    if os.getenv("PII_FAST") != "1":
+        return
+    nlp = getattr(analyzer.nlp_engine, "nlp", None) or {}
+    if "en" not in nlp:
+        return
+    for name in ("parser", "lemmatizer", "attribute_ruler", "senter"):
+        if name in nlp["en"].pipe_names:
+            nlp["en"].disable_pipe(name)
+
+
+def build_analyzer(model: Optional[str] = None):
     from presidio_analyzer import AnalyzerEngine  # type: ignore
     from presidio_analyzer.nlp_engine import NlpEngineProvider  # type: ignore
 
     # Prefer en_core_web_lg, fallback to en_core_web_sm
-    for model in ("en_core_web_lg", "en_core_web_sm"):
+    models = (model,) if model else _DEFAULT_MODELS
+
+    with _ANALYZER_LOCK:
+        for name in models + ("default",):
+            if name in _ANALYZER_CACHE:
+                return _ANALYZER_CACHE[name]
+
+        for name in models:
+            try:
+                provider = NlpEngineProvider(nlp_configuration={
+                    "nlp_engine_name": "spacy",
+                    "models": [{"lang_code": "en", "model_name": name}],
+                })
+                nlp_engine = provider.create_engine()
+                analyzer = AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=["en"]) 
+                _restrict_phone_regions(analyzer)
+                _trim_pipeline(analyzer)
+                # Quick warm-up to validate
+                analyzer.analyze(text="warm up", language="en")
+                _ANALYZER_CACHE[name] = analyzer
+                return analyzer
+            except Exception:
+                continue
+
+        # Finally try default engine (works if env already has a default model)
         try:
-            provider = NlpEngineProvider(nlp_configuration={
-                "nlp_engine_name": "spacy",
-                "models": [{"lang_code": "en", "model_name": model}],
-            })
-            nlp_engine = provider.create_engine()
-            analyzer = AnalyzerEngine(nlp_engine=nlp_engine, supported_languages=["en"]) 
-            # Quick warm-up to validate
+            analyzer = AnalyzerEngine()
+            _restrict_phone_regions(analyzer)
+            _trim_pipeline(analyzer)
             analyzer.analyze(text="warm up", language="en")
+            _ANALYZER_CACHE["default"] = analyzer
             return analyzer
-        except Exception:
-            continue
+        except Exception as exc:
+            raise RuntimeError(
+                "No usable spaCy English model found. Install one and retry:\n"
+                "  - en_core_web_sm: python -m spacy download en_core_web_sm\n"
+                "  - en_core_web_lg: python -m spacy download en_core_web_lg\n"
+                f"Original error: {exc}"
+            )
 
-    # Finally try default engine (works if env already has a default model)
-    try:
-        analyzer = AnalyzerEngine()
-        analyzer.analyze(text="warm up", language="en")
-        return analyzer
-    except Exception as exc:
-        raise RuntimeError(
-            "No usable spaCy English model found. Install one and retry:\n"
-            "  - en_core_web_sm: python -m spacy download en_core_web_sm\n"
-            "  - en_core_web_lg: python -m spacy download en_core_web_lg\n"
-            f"Original error: {exc}"
-        )
+
+_FAST_ANALYZERS: Dict[int, Any] = {}
+# Building the Hyperscan database costs more than it saves on a single document,
+# so only long-lived callers (batch-encrypt workers, pii_server) turn it on
+_FAST_ANALYZER_ENABLED = False
+
+
+def enable_fast_analyzer():
+    """Use the Hyperscan pattern pass in analyze_pii from now on (if hyperscan is installed)."""
+    global _FAST_ANALYZER_ENABLED
+    _FAST_ANALYZER_ENABLED = True
+
+
+def get_fast_analyzer(analyzer):
+    """Return the shared Hyperscan pattern pass for analyzer, or None if it is not
+    enabled (see enable_fast_analyzer) or hyperscan is missing.
+
+    Regex-only entity types (EMAIL_ADDRESS, US_SSN, IP_ADDRESS, ...) are
+    matched in a single Hyperscan scan; only the remaining types (spaCy NER,
+    phone numbers, ...) go through analyzer.analyze. See fast_analyzer.py.
+    """
+    if not _FAST_ANALYZER_ENABLED:
+        return None
+    with _ANALYZER_LOCK:
+        key = id(analyzer)
+        if key not in _FAST_ANALYZERS:
+            try:
+                from fast_analyzer import FastAnalyzer  # type: ignore
+
+                _FAST_ANALYZERS[key] = FastAnalyzer(analyzer, language="en")
+            except RuntimeError:
+                _FAST_ANALYZERS[key] = None
+        return _FAST_ANALYZERS[key]
+
+
+# Long-running processes can pay the model load at import instead of on the first document
+if os.getenv("PII_PRELOAD_SPACY") == "1":
+    build_analyzer()
 
 
 @dataclass
@@ -116,43 +270,94 @@ class PiiMatch:
 
 def calculate_line_col_map(text: str) -> List[int]:
     # Return the start offset of each line
+    if np is not None:
+        # Scan for newlines in C over a fixed-width view of the text, so indices are
+        # code-point offsets like Presidio's (UTF-32 only needed for non-ASCII text)
+        if text.isascii():
+            codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+        else:
+            codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        return [0] + (np.flatnonzero(codes == 0x0A) + 1).tolist()
+
     line_starts = [0]
-    for match in re.finditer("\n", text):
-        line_starts.append(match.end())
+    pos = text.find("\n")
+    while pos != -1:
+        line_starts.append(pos + 1)
+        pos = text.find("\n", pos + 1)
     return line_starts
 
 
 def offset_to_line_col(offset: int, line_starts: List[int]) -> Tuple[int, int]:
-    # Linear scan is fine for small docs; binary search could optimize
-    line_index = 0
-    for i, start in enumerate(line_starts):
-        if start <= offset:
-            line_index = i
-        else:
-            break
+    line_index = bisect.bisect_right(line_starts, offset) - 1
     line_start = line_starts[line_index]
     line_no = line_index + 1
     col_no = offset - line_start + 1
     return line_no, col_no
 
 
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+# Documents longer than this are analyzed in paragraph-aligned chunks in parallel
+_CHUNK_CHARS = 20000
+
+
+def split_with_offsets(text: str, max_chars: int = _CHUNK_CHARS) -> List[Tuple[int, str]]:
+    # Cut only at blank lines so entities inside a paragraph are never split
+    chunks: List[Tuple[int, str]] = []
+    start = 0
+    for m in _PARAGRAPH_BREAK.finditer(text):
+        if m.end() - start >= max_chars:
+            chunks.append((start, text[start:m.end()]))
+            start = m.end()
+    if start < len(text) or not chunks:
+        chunks.append((start, text[start:]))
+    return chunks
+
+
 def analyze_pii(md_text: str, entities: Optional[List[str]] = None) -> List[PiiMatch]:
     from presidio_analyzer import RecognizerResult  # type: ignore
 
     analyzer = build_analyzer()
-    results: List[RecognizerResult] = analyzer.analyze(
-        text=md_text,
-        language="en",
-        entities=entities,
-        return_decision_process=False,
-    )
+    fast_analyzer = get_fast_analyzer(analyzer)
+
+    def _analyze_chunk(chunk: Tuple[int, str]) -> List[RecognizerResult]:
+        offset, text = chunk
+        if fast_analyzer is not None:
+            chunk_results = fast_analyzer.analyze(text, entities)
+        else:
+            chunk_results = analyzer.analyze(
+                text=text,
+                language="en",
+                entities=entities,
+                return_decision_process=False,
+            )
+        for r in chunk_results:
+            r.start += offset
+            r.end += offset
+        return chunk_results
+
+    chunks = split_with_offsets(md_text)
+    if len(chunks) == 1:
+        results = _analyze_chunk(chunks[0])
+    else:
+        # spaCy releases the GIL in its compiled pipeline steps
+        with ThreadPoolExecutor(max_workers=min(len(chunks), os.cpu_count() or 1)) as executor:
+            results = [r for chunk_results in executor.map(_analyze_chunk, chunks) for r in chunk_results]
 
     line_starts = calculate_line_col_map(md_text)
+    # Visit results by start offset so the line index only ever moves forward,
+    # but keep the analyzer's result order in the output
+    positions: List[Tuple[int, int]] = [(0, 0)] * len(results)
+    line_index = 0
+    for i in sorted(range(len(results)), key=lambda i: results[i].start):
+        start = results[i].start
+        while line_index + 1 < len(line_starts) and line_starts[line_index + 1] <= start:
+            line_index += 1
+        positions[i] = (line_index + 1, start - line_starts[line_index] + 1)
+
     matches: List[PiiMatch] = []
-    for r in results:
+    for r, (line, column) in zip(results, positions):
         start, end = r.start, r.end
         snippet = md_text[start:end]
-        line, column = offset_to_line_col(start, line_starts)
         matches.append(PiiMatch(
             start=start,
             end=end,
@@ -186,8 +391,7 @@ def write_report(md_path: str, matches: List[PiiMatch], report_path: Optional[st
         ],
     }
 
-    with open(report_path, "w", encoding="utf-8", newline="\n") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    _dump(data, report_path)
 
     return report_path
 
@@ -196,40 +400,76 @@ ENCODED_PATTERN = re.compile(r"\{\{ENC:([A-Z_]+):([A-Za-z0-9_\-]+=*)\}\}")
 
 
 def apply_encryption_replacements(md_text: str, matches: List[PiiMatch], key_b64: bytes) -> str:
-    # Replace from back to front to avoid offset drift
-    matches_sorted = sorted(matches, key=lambda m: m.start, reverse=True)
-    buf = md_text
-    for m in matches_sorted:
-        ciphertext = encrypt_text(m.text, key_b64)
-        safe_token = f"{{{{ENC:{m.entity_type}:{ciphertext}}}}}"
-        buf = buf[: m.start] + safe_token + buf[m.end :]
-    return buf
+    # Assemble the output front to back in one pass; overlapping matches are skipped
+    f = _get_fernet(key_b64)
+    # Repeated values are encrypted once per document. Tradeoff: every occurrence
+    # of the same value then carries the same token (Fernet would otherwise use a
+    # fresh IV each time), so equal values are linkable within this document only.
+    tokens: Dict[Tuple[str, str], str] = {}
+    parts: List[str] = []
+    cursor = 0
+    for m in sorted(matches, key=lambda m: (m.start, -m.end)):
+        if m.start < cursor:
+            continue
+        safe_token = tokens.get((m.entity_type, m.text))
+        if safe_token is None:
+            ciphertext = f.encrypt(m.text.encode("utf-8")).decode("ascii")
+            safe_token = f"{{{{ENC:{m.entity_type}:{ciphertext}}}}}"
+            tokens[(m.entity_type, m.text)] = safe_token
+        parts.append(md_text[cursor:m.start])
+        parts.append(safe_token)
+        cursor = m.end
+    parts.append(md_text[cursor:])
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=4096)
+def _placeholder(text: str, entity_type: str) -> str:
+    # BLAKE2 is stable across runs (unlike hash(), which is salted per process),
+    # so the same value gets the same placeholder in every document
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=2).digest()
+    hash_suffix = int.from_bytes(digest, "big") % 10000
+    return f"[{entity_type}_{hash_suffix}]"
 
 
 def apply_anonymization_replacements(md_text: str, matches: List[PiiMatch]) -> str:
     """Apply irreversible anonymization by replacing PII with placeholders."""
-    matches_sorted = sorted(matches, key=lambda m: m.start, reverse=True)
-    buf = md_text
-    for m in matches_sorted:
+    parts: List[str] = []
+    cursor = 0
+    for m in sorted(matches, key=lambda m: (m.start, -m.end)):
+        if m.start < cursor:
+            continue
         # Use hash to create consistent but non-reversible placeholder
-        hash_suffix = abs(hash(m.text)) % 10000
-        placeholder = f"[{m.entity_type}_{hash_suffix}]"
-        buf = buf[: m.start] + placeholder + buf[m.end :]
-    return buf
+        placeholder = _placeholder(m.text, m.entity_type)
+        parts.append(md_text[cursor:m.start])
+        parts.append(placeholder)
+        cursor = m.end
+    parts.append(md_text[cursor:])
+    return "".join(parts)
 
 
 def decrypt_markers(md_text: str, key_b64: bytes) -> str:
-    def _replace(match: re.Match) -> str:
-        entity = match.group(1)
-        token = match.group(2)
+    try:
+        f = _get_fernet(key_b64)
+    except Exception:
+        # Unusable key: nothing can be decrypted, keep all markers as-is
+        return md_text
+
+    # Same join-based assembly as the replacements, instead of a re.sub callback.
+    # The regex engine already skips ahead to the literal "{{ENC:" prefix; a
+    # str.find or Aho-Corasick prefix scan measured no faster (pyahocorasick ~7x slower)
+    parts: List[str] = []
+    last = 0
+    for match in ENCODED_PATTERN.finditer(md_text):
+        parts.append(md_text[last:match.start()])
         try:
-            plain = decrypt_text(token, key_b64)
-            return plain
+            parts.append(f.decrypt(match.group(2).encode("ascii")).decode("utf-8"))
         except Exception:
             # If decryption fails, keep marker as-is to avoid data loss
-            return match.group(0)
-
-    return ENCODED_PATTERN.sub(_replace, md_text)
+            parts.append(match.group(0))
+        last = match.end()
+    parts.append(md_text[last:])
+    return "".join(parts)
 
 
 def _derive_outdir_from_input(input_path: str, explicit_outdir: Optional[str]) -> str:
@@ -249,12 +489,92 @@ def _convert_pdf_if_needed(input_path: str, outdir: str) -> str:
         # Lazy import to avoid circular deps
         from pdf_to_md import convert_pdf_to_md  # type: ignore
 
-        md_path = convert_pdf_to_md(input_path, output_md_path=None, output_dir=outdir)
+        # No conversion cache: it would keep an unmasked copy of the document
+        md_path = convert_pdf_to_md(input_path, output_md_path=None, output_dir=outdir, use_cache=False)
         return md_path
     return input_path
 
 
-def main() -> int:
+def _read_text(path: str) -> str:
+    """Read a UTF-8 text file the way open(path, encoding="utf-8").read() does.
+
+    The file is memory-mapped and decoded straight from the mapping, so no
+    intermediate bytes copy or read buffer is allocated. Files that cannot be
+    mapped (empty files, pipes, or files larger than the address space on
+    32-bit systems) are read normally.
+    """
+    with open(path, "rb") as raw:
+        try:
+            mm = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            with open(path, "r", encoding="utf-8", buffering=_IO_BUFFER_SIZE) as f:
+                return f.read()
+        with mm:
+            text = str(mm, "utf-8")
+    # Same universal-newline translation as text mode, so offsets are unchanged
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _encrypt_file(input_path: str, outdir: str, output: Optional[str], mode: str,
+                  key_b64: Optional[bytes], entities: Optional[List[str]],
+                  report: Optional[str] = None) -> Tuple[str, str, Dict[str, int]]:
+    """Detect and replace PII in one document; returns (output path, report path, entity counts)."""
+    # If input is PDF, convert to Markdown first
+    work_input = _convert_pdf_if_needed(input_path, outdir)
+
+    md_text = _read_text(work_input)
+
+    matches = analyze_pii(md_text, entities)
+
+    # Target Markdown output path
+    if output:
+        out_md_path = output
+        os.makedirs(os.path.dirname(out_md_path) or ".", exist_ok=True)
+    else:
+        base = os.path.splitext(os.path.basename(work_input))[0]
+        out_md_path = os.path.join(outdir, base + ".md")
+
+    # Report path
+    report_path = report or (out_md_path + ".pii.json")
+
+    # Write outputs based on mode
+    if mode == "encrypt":
+        processed_text = apply_encryption_replacements(md_text, matches, key_b64)
+    else:  # anonymize
+        processed_text = apply_anonymization_replacements(md_text, matches)
+
+    with open(out_md_path, "w", encoding="utf-8", newline="\n", buffering=_IO_BUFFER_SIZE) as f:
+        f.write(processed_text)
+    write_report(out_md_path, matches, report_path)
+
+    entity_counts: Dict[str, int] = {}
+    for m in matches:
+        entity_counts[m.entity_type] = entity_counts.get(m.entity_type, 0) + 1
+    return out_md_path, report_path, entity_counts
+
+
+# ---- batch-encrypt workers ----
+def _worker_init():
+    # Load spaCy/Presidio (and the Hyperscan database) once per worker process;
+    # every file it handles reuses them
+    enable_fast_analyzer()
+    get_fast_analyzer(build_analyzer())
+
+
+def _process_one(job: Tuple[str, str, str, Optional[bytes], Optional[List[str]]]):
+    input_path, outdir, mode, key_b64, entities = job
+    try:
+        out_md_path, report_path, entity_counts = _encrypt_file(
+            input_path, outdir, None, mode, key_b64, entities
+        )
+    except Exception as exc:
+        return input_path, None, None, None, str(exc)
+    return input_path, out_md_path, report_path, entity_counts, None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Detect and encrypt/decrypt PII in Markdown/PDF")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
@@ -271,6 +591,18 @@ def main() -> int:
     p_enc.add_argument("--print-key", action="store_true", help="Print the generated key (only for encrypt mode)")
     p_enc.add_argument("--audit-log", default="audit.log", help="Audit log file path (default: audit.log)")
 
+    # batch-encrypt subcommand
+    p_batch = sub.add_parser("batch-encrypt", help="Detect and encrypt PII in every Markdown/PDF file of a directory")
+    p_batch.add_argument("--input-dir", required=True, help="Directory containing the input Markdown/PDF files")
+    p_batch.add_argument("--output-dir", required=True, help="Directory for processed files and PII reports")
+    p_batch.add_argument("--mode", choices=["encrypt", "anonymize"], default="encrypt",
+                         help="Processing mode: 'encrypt' (reversible) or 'anonymize' (irreversible)")
+    p_batch.add_argument("--key", help="Base64(urlsafe) Fernet key used for all files. If omitted, a new key is generated (only for encrypt mode)")
+    p_batch.add_argument("--entities", nargs="*", help="Restrict PII types, e.g. EMAIL_ADDRESS PHONE_NUMBER")
+    p_batch.add_argument("--print-key", action="store_true", help="Print the generated key (only for encrypt mode)")
+    p_batch.add_argument("--jobs", type=int, default=4, help="Worker processes, each loading its own spaCy model (default: 4)")
+    p_batch.add_argument("--audit-log", default="audit.log", help="Audit log file path (default: audit.log)")
+
     # decrypt subcommand
     p_dec = sub.add_parser("decrypt", help="Decrypt PII markers in the document")
     p_dec.add_argument("input", help="Input Markdown file containing {{ENC:..}} markers")
@@ -279,7 +611,7 @@ def main() -> int:
     p_dec.add_argument("--key", required=True, help="Base64(urlsafe) Fernet key")
     p_dec.add_argument("--audit-log", default="audit.log", help="Audit log file path (default: audit.log)")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if args.cmd == "encrypt":
         # Setup audit logging
@@ -294,9 +626,6 @@ def main() -> int:
 
         outdir = _derive_outdir_from_input(args.input, args.outdir)
 
-        # If input is PDF, convert to Markdown first
-        work_input = _convert_pdf_if_needed(args.input, outdir)
-
         # For anonymize mode, key is not needed
         if args.mode == "encrypt":
             key_b64 = ensure_fernet_key(args.key)
@@ -305,42 +634,16 @@ def main() -> int:
             key_b64 = None
             key_b64_str = None
 
-        with open(work_input, "r", encoding="utf-8") as f:
-            md_text = f.read()
-
-        matches = analyze_pii(md_text, args.entities)
-
-        # Target Markdown output path
-        if args.output:
-            out_md_path = args.output
-            os.makedirs(os.path.dirname(out_md_path) or ".", exist_ok=True)
-        else:
-            base = os.path.splitext(os.path.basename(work_input))[0]
-            out_md_path = os.path.join(outdir, base + ".md")
-
-        # Report path
-        report_path = args.report or (out_md_path + ".pii.json")
-
-        # Write outputs based on mode
-        if args.mode == "encrypt":
-            processed_text = apply_encryption_replacements(md_text, matches, key_b64)
-        else:  # anonymize
-            processed_text = apply_anonymization_replacements(md_text, matches)
-        
-        with open(out_md_path, "w", encoding="utf-8", newline="\n") as f:
-            f.write(processed_text)
-        write_report(out_md_path, matches, report_path)
+        out_md_path, report_path, entity_counts = _encrypt_file(
+            args.input, outdir, args.output, args.mode, key_b64, args.entities, args.report
+        )
 
         # Log audit event
-        entity_counts = {}
-        for m in matches:
-            entity_counts[m.entity_type] = entity_counts.get(m.entity_type, 0) + 1
-        
         log_audit_event(
             operation=f"pii_{args.mode}",
             file_path=args.input,
             mode=args.mode,
-            pii_total=len(matches),
+            pii_total=sum(entity_counts.values()),
             entity_counts=entity_counts,
             output_file=os.path.basename(out_md_path),
             report_file=os.path.basename(report_path)
@@ -352,6 +655,68 @@ def main() -> int:
             print(f"Generated key (keep it safe): {key_b64_str}")
         return 0
 
+    if args.cmd == "batch-encrypt":
+        setup_audit_logger(args.audit_log)
+
+        if not os.path.isdir(args.input_dir):
+            print(f"Directory not found: {args.input_dir}", file=sys.stderr)
+            return 1
+        if os.path.realpath(args.input_dir) == os.path.realpath(args.output_dir):
+            print("--output-dir must differ from --input-dir (outputs would overwrite the inputs)",
+                  file=sys.stderr)
+            return 1
+
+        input_paths = sorted(
+            entry.path for entry in os.scandir(args.input_dir)
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in (".md", ".pdf")
+        )
+        if not input_paths:
+            print(f"No Markdown or PDF files in {args.input_dir}")
+            return 0
+
+        # Every input is written to <output-dir>/<stem>.md, so e.g. a.md and a.pdf would collide
+        by_stem: Dict[str, List[str]] = {}
+        for path in input_paths:
+            by_stem.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+        clashes = [paths for paths in by_stem.values() if len(paths) > 1]
+        if clashes:
+            for paths in clashes:
+                print(f"Inputs would write the same output: {', '.join(paths)}", file=sys.stderr)
+            return 1
+        os.makedirs(args.output_dir, exist_ok=True)
+
+        # One key for the whole batch, so every output decrypts with it
+        if args.mode == "encrypt":
+            key_b64 = ensure_fernet_key(args.key)
+        else:
+            key_b64 = None
+
+        jobs = [(path, args.output_dir, args.mode, key_b64, args.entities) for path in input_paths]
+        failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(jobs))),
+                                 initializer=_worker_init) as executor:
+            for input_path, out_md_path, report_path, entity_counts, error in executor.map(_process_one, jobs):
+                if error is not None:
+                    print(f"Error processing {input_path}: {error}", file=sys.stderr)
+                    failed += 1
+                    continue
+                log_audit_event(
+                    operation=f"pii_{args.mode}",
+                    file_path=input_path,
+                    mode=args.mode,
+                    pii_total=sum(entity_counts.values()),
+                    entity_counts=entity_counts,
+                    output_file=os.path.basename(out_md_path),
+                    report_file=os.path.basename(report_path)
+                )
+                print(f"Written: {out_md_path}")
+                print(f"PII report: {report_path}")
+
+        print(f"Processed {len(jobs) - failed}/{len(jobs)} file(s)")
+        if args.mode == "encrypt" and not args.key and args.print_key:
+            print(f"Generated key (keep it safe): {key_b64.decode('utf-8')}")
+        return 1 if failed else 0
+
     if args.cmd == "decrypt":
         # Setup audit logging
         setup_audit_logger(args.audit_log)
@@ -370,8 +735,7 @@ def main() -> int:
             print(str(exc), file=sys.stderr)
             return 1
 
-        with open(args.input, "r", encoding="utf-8") as f:
-            md_text = f.read()
+        md_text = _read_text(args.input)
 
         # Count encrypted markers before decryption
         encrypted_markers = len(ENCODED_PATTERN.findall(md_text))
@@ -391,7 +755,7 @@ def main() -> int:
             base = os.path.splitext(os.path.basename(args.input))[0]
             out_path = os.path.join(input_dir, base + ".decrypted.md")
 
-        with open(out_path, "w", encoding="utf-8", newline="\n") as f:
+        with open(out_path, "w", encoding="utf-8", newline="\n", buffering=_IO_BUFFER_SIZE) as f:
             f.write(decrypted_text)
         
         # Log audit event
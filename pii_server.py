@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Long-running PII job server for the processing container.
+`serve` keeps one Python process (and its loaded spaCy/Presidio models)
+alive and runs pii_encrypt_md jobs received over a Unix socket; `submit`
+is a lightweight client that forwards its arguments as one job.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+
+SOCKET_PATH = "/tmp/pii_server.sock"
+
+
+def _recv_line(conn: socket.socket) -> bytes:
+    buf = b""
+    while not buf.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
+def _run_job(argv, pii_encrypt_md) -> dict:
+    out, err = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            code = pii_encrypt_md.main(argv)
+        except SystemExit as e:  # argparse errors
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            code = 1
+    return {"code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+
+def _handle(conn: socket.socket, pii_encrypt_md) -> None:
+    try:
+        argv = json.loads(_recv_line(conn))
+    except ValueError:  # empty line (client closed early) or not JSON
+        argv = None
+    if isinstance(argv, list) and all(isinstance(a, str) for a in argv):
+        reply = _run_job(argv, pii_encrypt_md)
+    else:
+        reply = {"code": 2, "stdout": "", "stderr": "Error: invalid request; expected a JSON list of arguments\n"}
+    conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+
+
+def serve(socket_path: str = SOCKET_PATH) -> int:
+    import pii_encrypt_md
+
+    # As PID 1 in the container SIGTERM would otherwise be ignored and `docker stop`
+    # would wait for its SIGKILL timeout; treat it like Ctrl-C and shut down
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    # Clients may connect (and wait in the backlog) while models load. The loaded
+    # analyzer and Hyperscan database are cached in pii_encrypt_md and reused by every job.
+    pii_encrypt_md.enable_fast_analyzer()
+    pii_encrypt_md.get_fast_analyzer(pii_encrypt_md.build_analyzer())
+    print(f"PII server ready on {socket_path}", flush=True)
+
+    try:
+        with server:
+            while True:
+                conn, _ = server.accept()
+                with conn:
+                    try:
+                        _handle(conn, pii_encrypt_md)
+                    except OSError:  # client went away mid-request; keep serving
+                        pass
+    except KeyboardInterrupt:  # SIGINT/SIGTERM; not caught by the job handlers above
+        pass
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+    return 0
+
+
+def submit(argv, socket_path: str = SOCKET_PATH, timeout: float = 120.0) -> int:
+    # The server may still be starting; retry until its socket accepts connections
+    deadline = time.monotonic() + timeout
+    while True:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(socket_path)
+            break
+        except OSError:
+            conn.close()
+            if time.monotonic() > deadline:
+                print(f"Error: PII server not reachable at {socket_path}", file=sys.stderr)
+                return 1
+            time.sleep(0.2)
+
+    with conn:
+        conn.sendall(json.dumps(argv).encode("utf-8") + b"\n")
+        reply = json.loads(_recv_line(conn))
+
+    sys.stdout.write(reply["stdout"])
+    sys.stderr.write(reply["stderr"])
+    return reply["code"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Long-running PII processing server")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve", help="Run the job server")
+    p_serve.add_argument("--socket", default=SOCKET_PATH, help=f"Unix socket path (default: {SOCKET_PATH})")
+    p_submit = sub.add_parser("submit", help="Send one pii_encrypt_md job to the server")
+    p_submit.add_argument("--socket", default=SOCKET_PATH, help=f"Unix socket path (default: {SOCKET_PATH})")
+    p_submit.add_argument("job", nargs=argparse.REMAINDER, help="pii_encrypt_md.py arguments")
+
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        return serve(args.socket)
+    return submit(args.job, args.socket)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,6 +10,29 @@ import sys
 from datetime import datetime
 from typing import Optional
 
+try:
+    import orjson  # type: ignore
+except ImportError:  # Optional; falls back to the stdlib json module
+    orjson = None
+
+
+# Created on first upload and reused, so credential resolution, endpoint setup and
+# pooled HTTPS connections are shared by every upload in the process
+_S3_CLIENT = None
+
+
+def _get_s3_client():
+    global _S3_CLIENT
+    if _S3_CLIENT is None:
+        import boto3  # type: ignore
+        from botocore.config import Config  # type: ignore
+
+        _S3_CLIENT = boto3.client('s3', config=Config(
+            max_pool_connections=32,
+            retries={'mode': 'adaptive', 'max_attempts': 5}
+        ))
+    return _S3_CLIENT
+
 
 def upload_to_s3(
     file_path: str,
@@ -34,7 +57,7 @@ def upload_to_s3(
         S3 URI (s3://bucket/key)
     """
     try:
-        import boto3  # type: ignore
+        from boto3.s3.transfer import TransferConfig  # type: ignore
     except ImportError:
         raise RuntimeError(
             "boto3 is not installed. Install it with:\n"
@@ -48,24 +71,27 @@ def upload_to_s3(
     if key is None:
         key = os.path.basename(file_path)
     
-    s3_client = boto3.client('s3')
+    s3_client = _get_s3_client()
     
     # Prepare upload args
-    upload_args = {
-        'Bucket': bucket,
-        'Key': key,
+    extra_args = {
         'ServerSideEncryption': encryption
     }
     
     if encryption == 'aws:kms' and kms_key_id:
-        upload_args['SSEKMSKeyId'] = kms_key_id
+        extra_args['SSEKMSKeyId'] = kms_key_id
     
     if metadata:
-        upload_args['Metadata'] = metadata
+        extra_args['Metadata'] = metadata
     
-    # Upload file
+    # Stream the file; large files go up as parallel multipart chunks
+    transfer_config = TransferConfig(
+        multipart_threshold=8 * 1024 * 1024,
+        multipart_chunksize=8 * 1024 * 1024,
+        max_concurrency=8
+    )
     with open(file_path, 'rb') as f:
-        s3_client.put_object(Body=f.read(), **upload_args)
+        s3_client.upload_fileobj(f, bucket, key, ExtraArgs=extra_args, Config=transfer_config)
     
     s3_uri = f"s3://{bucket}/{key}"
     return s3_uri
@@ -83,8 +109,11 @@ def log_upload_event(log_file: str, file_path: str, s3_uri: str, encryption: str
     }
     
     try:
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        with open(log_file, "a", encoding="utf-8", buffering=65536) as f:
+            if orjson is not None:
+                f.write(orjson.dumps(event).decode("utf-8") + "\n")
+            else:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
     except OSError as e:
         print(f"Warning: Could not write to audit log: {e}", file=sys.stderr)
 